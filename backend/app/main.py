@@ -2,51 +2,66 @@
 from __future__ import annotations
 
 import os, re
-import json
+import atexit
+import asyncio
+import contextlib
+import logging
+import queue
+import time
 import datetime as dt
-from typing import Optional, List, Any, Dict
+from logging.handlers import QueueHandler, QueueListener
+import anyio
+from dataclasses import dataclass, fields, astuple
+from typing import Optional, List, Any, Dict, Tuple, Sequence
 
 from fastapi import FastAPI, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, field_validator
 
-from typing import Optional
 from io import BytesIO
 import base64
-from sendgrid import SendGridAPIClient
-from sendgrid.helpers.mail import Mail, Bcc, Attachment, FileContent, FileName, FileType, Disposition
-
-from reportlab.lib.pagesizes import letter
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import inch
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, Image, PageBreak
-from reportlab.lib import colors
-from io import BytesIO
-import base64
-
-import matplotlib
-matplotlib.use('Agg')  # Non-interactive backend
-import matplotlib.pyplot as plt
-import matplotlib.patches as mpatches
-
-# Your valuation logic
-from .valuations import compute_valuation, ValuationInput  # ValuationOutput not required to import
+import httpx
 
 from pathlib import Path
-from dotenv import load_dotenv
 
-# Resolve backend/.env regardless of where uvicorn is launched
+# -----------------------------------------------------------------------------
+# Logging: handlers run on a QueueListener thread, so request code only enqueues
+# -----------------------------------------------------------------------------
+LOG = logging.getLogger("app")  # sheets.py logs under "app.sheets"
+if not LOG.handlers:
+    _log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    h = logging.StreamHandler()
+    h.setFormatter(logging.Formatter("[%(name)s] %(levelname)s: %(message)s"))
+    _log_listener = QueueListener(_log_queue, h)
+    _log_listener.start()
+    atexit.register(_log_listener.stop)
+    LOG.addHandler(QueueHandler(_log_queue))
+LOG.setLevel(logging.INFO)
+
+# Resolve backend/.env regardless of where uvicorn is launched. Only in dev:
+# deployed workers get their env from the platform and skip the file entirely.
+APP_ENV = os.getenv("ENV", "dev")
 DOTENV_PATH = (Path(__file__).resolve().parents[1] / ".env")
-load_dotenv(dotenv_path=DOTENV_PATH, override=True)
-print(f"[env] loaded .env from {DOTENV_PATH.exists() and DOTENV_PATH or 'NOT FOUND'}")
+if APP_ENV == "dev":
+    from dotenv import load_dotenv
+    load_dotenv(dotenv_path=DOTENV_PATH, override=True)
+    LOG.info("loaded .env from %s", DOTENV_PATH if DOTENV_PATH.exists() else "NOT FOUND")
+
+# Local modules read their settings from env at import, so after load_dotenv
+from . import sheets
+# Your valuation logic
+from .valuations import compute_valuation, ValuationInput  # ValuationOutput not required to import
 
 # -----------------------------------------------------------------------------
 # CORS (adjust via env)
 # -----------------------------------------------------------------------------
-ALLOW_ORIGINS = os.getenv("CORS_ALLOW_ORIGINS", "https://valuation.nerdlawyer.ai/")
-ALLOW_ORIGINS_LIST = [o.strip() for o in ALLOW_ORIGINS.split(",") if o.strip()]
+ALLOW_ORIGINS = os.getenv("CORS_ALLOW_ORIGINS", "https://valuation.nerdlawyer.ai,http://localhost:3000")
+# Browsers send Origin without a trailing slash, so "https://host/" would never match
+ALLOW_ORIGINS_LIST = [o.strip().rstrip("/") for o in ALLOW_ORIGINS.split(",") if o.strip()]
 
-app = FastAPI()
+app = FastAPI(default_response_class=ORJSONResponse)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=ALLOW_ORIGINS_LIST,
@@ -54,6 +69,15 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+
+# Blocking work (Sheets, SendGrid, PDF rendering) runs on AnyIO worker threads;
+# the default limit of 40 is low for a service that mostly waits on HTTP.
+THREADPOOL_SIZE = int(os.getenv("THREADPOOL_SIZE", "100"))
+
+@app.on_event("startup")
+async def _raise_threadpool_limit() -> None:
+    anyio.to_thread.current_default_thread_limiter().total_tokens = THREADPOOL_SIZE
+
 # -----------------------------------------------------------------------------
 # SendGrid helpers 
 # -----------------------------------------------------------------------------
@@ -69,457 +93,94 @@ def parse_recipients(raw: str | None) -> list[str]:
             out.append(p)
     return out
 
-def parse_recipients(raw: str | None) -> list[str]:
-    if not raw:
-        return []
-    parts = re.split(r'[,\s;]+', raw.strip())
-    seen, out = set(), []
-    for p in parts:
-        if p and p not in seen:
-            seen.add(p)
-            out.append(p)
-    return out
+SENDGRID_BASE_URL = "https://api.sendgrid.com"
+SENDGRID_API_KEY = os.getenv("SENDGRID_API_KEY")
+NOTIFICATION_RECIPIENTS = parse_recipients(os.getenv("NOTIFICATION_EMAIL"))
+SENDGRID_FROM = os.getenv("SENDGRID_FROM", "curt@nerdlawyer.ai")  # must be verified
+SENDGRID_PLACEHOLDER_TO = os.getenv("SENDGRID_PLACEHOLDER_TO", "no-reply@nerdlawyer.ai")
+_sendgrid_http: Optional[httpx.AsyncClient] = None
+
+@app.on_event("startup")
+async def _open_sendgrid_client() -> None:
+    global _sendgrid_http
+    # One pooled HTTP/2 client so sends reuse a warm TLS connection; auth is baked in
+    _sendgrid_http = httpx.AsyncClient(
+        base_url=SENDGRID_BASE_URL,
+        http2=True,
+        timeout=10.0,
+        headers={"Authorization": f"Bearer {SENDGRID_API_KEY}"} if SENDGRID_API_KEY else None,
+    )
 
-def send_notification_email(
+async def send_notification_email(
     subject: str,
     body: str,
-    attachment_data: Optional[BytesIO] = None,
-    attachment_name: str = "valuation_report.pdf",
-):
-    api_key = os.getenv("SENDGRID_API_KEY")
-    raw_recipients = os.getenv("NOTIFICATION_EMAIL")
-    from_addr = os.getenv("SENDGRID_FROM", "curt@nerdlawyer.ai")  # must be verified
-    placeholder_to = os.getenv("SENDGRID_PLACEHOLDER_TO", "no-reply@nerdlawyer.ai")
-
-    recipients = parse_recipients(raw_recipients)
-    if not api_key or not recipients:
-        print("[Email] Missing SENDGRID_API_KEY or NOTIFICATION_EMAIL")
-        return
-
-    try:
-        # real “to” + everyone else as BCC (privacy)
-        message = Mail(
-            from_email=from_addr,
-            to_emails=placeholder_to,  # required even with BCC
-            subject=subject,
-            html_content=body,
-        )
-        for r in recipients:
-            message.add_bcc(Bcc(r))  # <- use method, not property assignment
-
-        if attachment_data:
-            attachment_data.seek(0)
-            encoded = base64.b64encode(attachment_data.read()).decode()
-            message.attachment = Attachment(
-                FileContent(encoded),
-                FileName(attachment_name),
-                FileType('application/pdf'),
-                Disposition('attachment'),
-            )
-
-        sg = SendGridAPIClient(api_key)
-        resp = sg.send(message)
-        print(f"[Email] Sent (status {getattr(resp, 'status_code', '?')}) "
-              f"{'with PDF attachment' if attachment_data else ''}")
-
-    except Exception as e:
-        status = getattr(getattr(e, 'response', None), 'status_code', None)
-        details = None
-        if getattr(e, 'response', None) and getattr(e.response, 'body', None):
-            try:
-                details = e.response.body.decode() if hasattr(e.response.body, 'decode') else e.response.body
-            except Exception:
-                details = str(e.response.body)
-        print(f"[Email] Failed to send. Status={status} Details={details or e}")
-
-# -----------------------------------------------------------------------------
-# Google Sheets helpers (no-op if not configured)
-# -----------------------------------------------------------------------------
-_GS_READY = False
-_gs_client = None
-_gs_sheet = None
-
-def _utcnow_iso() -> str:
-    return dt.datetime.utcnow().replace(tzinfo=dt.timezone.utc).isoformat()
+    attachments: Optional[List[Tuple[str, BytesIO]]] = None,  # (filename, PDF)
+) -> bool:
+    """Send via SendGrid. False only when the send failed in a way worth retrying
+    (network error, 429, 5xx); unconfigured email or a 4xx rejection return True."""
+    recipients = NOTIFICATION_RECIPIENTS
+    if not SENDGRID_API_KEY or not recipients:
+        LOG.warning("Email not sent: missing SENDGRID_API_KEY or NOTIFICATION_EMAIL")
+        return True
+    if _sendgrid_http is None:
+        LOG.warning("Email not sent: HTTP client not started")
+        return True
+
+    # real “to” + everyone else as BCC (privacy)
+    message: Dict[str, Any] = {
+        "personalizations": [{
+            "to": [{"email": SENDGRID_PLACEHOLDER_TO}],  # required even with BCC
+            "bcc": [{"email": r} for r in recipients],
+        }],
+        "from": {"email": SENDGRID_FROM},
+        "subject": subject,
+        "content": [{"type": "text/html", "value": body}],
+    }
 
-def _gs_init_once() -> None:
-    """Initialize gspread client once per process. If not configured, remain no-op."""
-    global _GS_READY, _gs_client, _gs_sheet
-    if _GS_READY:  # already tried
-        return
+    if attachments:
+        message["attachments"] = []
+        for attachment_name, attachment_data in attachments:
+            # Encode straight from the BytesIO's buffer; .read() would copy the whole PDF first
+            with attachment_data.getbuffer() as view:
+                encoded = base64.b64encode(view).decode("ascii")
+            message["attachments"].append({
+                "content": encoded,
+                "filename": attachment_name,
+                "type": "application/pdf",
+                "disposition": "attachment",
+            })
 
     try:
-        import gspread  # type: ignore
-        from google.oauth2.service_account import Credentials  # type: ignore
-
-        scopes = ["https://www.googleapis.com/auth/spreadsheets"]
-        key_json = os.getenv("GOOGLE_SERVICE_ACCOUNT_JSON")
-        key_path = os.getenv("GOOGLE_SERVICE_ACCOUNT_FILE")
-        spreadsheet_key = os.getenv("GSHEET_SPREADSHEET_KEY")
-        spreadsheet_name = os.getenv("GSHEET_NAME", "JVCP Valuation Logs")
-
-        if not (key_json or key_path):
-            # Not configured; stay as no-op
-            print("[Google Sheets] No credentials configured - logging disabled")
-            _GS_READY = True
-            return
-
-        if key_json:
-            info = json.loads(key_json)
-            creds = Credentials.from_service_account_info(info, scopes=scopes)
-        else:
-            creds = Credentials.from_service_account_file(key_path, scopes=scopes)
+        resp = await _sendgrid_http.post("/v3/mail/send", json=message)
+    except httpx.HTTPError as e:
+        LOG.error("Email failed to send. Details=%r", e)
+        return False
 
-        _gs_client = gspread.authorize(creds)
-        if spreadsheet_key:
-            _gs_sheet = _gs_client.open_by_key(spreadsheet_key)
-        else:
-            _gs_sheet = _gs_client.open(spreadsheet_name)
-
-        print(f"[Google Sheets] Successfully connected to spreadsheet")
-        _GS_READY = True
-    except Exception as e:
-        # Log the actual error so you can debug
-        print(f"[Google Sheets] Failed to initialize: {e}")
-        _GS_READY = True
-        _gs_client = None
-        _gs_sheet = None
-
-def _gs_append_row(worksheet_name: str, row: List[Any], headers: Optional[List[str]] = None) -> None:
-    """Append a row to a worksheet; create the worksheet if missing with optional headers."""
-    _gs_init_once()
-    if _gs_sheet is None:
-        return
-    try:
-        try:
-            ws = _gs_sheet.worksheet(worksheet_name)
-        except Exception:
-            # Create new worksheet with headers
-            ws = _gs_sheet.add_worksheet(title=worksheet_name, rows=1000, cols=26)
-            if headers:
-                ws.append_row(headers, value_input_option="USER_ENTERED")
-        
-        ws.append_row(row, value_input_option="USER_ENTERED")
-        print(f"[Google Sheets] Logged to {worksheet_name}")
-    except Exception as e:
-        print(f"[Google Sheets] Failed to append to {worksheet_name}: {e}")
+    if resp.status_code >= 400:
+        LOG.error("Email failed to send. Status=%s Details=%s", resp.status_code, resp.text)
+        return not (resp.status_code == 429 or resp.status_code >= 500)
+    LOG.info("Email sent (status %s) with %d PDF attachment(s)", resp.status_code, len(attachments or ()))
+    return True
 
 # -----------------------------------------------------------------------------
-# PDF Generation helpers
+# Google Sheets logging (see sheets.py)
 # -----------------------------------------------------------------------------
-def _create_valuation_chart(payload: ValuationRunIn) -> BytesIO:
-    """Create a horizontal bar chart showing valuation ranges"""
-    fig, ax = plt.subplots(figsize=(8, 4))
-    
-    categories = []
-    lows = []
-    highs = []
-    currents = []
-    
-    # PE Stack
-    pe_val = payload.ev_pe_stack or (payload.ebitda * 5.92) if payload.ebitda else None
-    if pe_val:
-        categories.append('PE Equity Stack')
-        lows.append(pe_val)
-        highs.append(pe_val)
-        currents.append(pe_val)
-    
-    # TEV Band
-    if payload.ev_tev_current and payload.ev_tev_avg:
-        categories.append('All-Industry\n(TEV Band)')
-        lows.append(min(payload.ev_tev_current, payload.ev_tev_avg))
-        highs.append(max(payload.ev_tev_current, payload.ev_tev_avg))
-        currents.append(payload.ev_tev_current)
-    elif payload.enterprise_value:
-        categories.append('All-Industry\n(TEV Band)')
-        lows.append(payload.enterprise_value * 0.9)
-        highs.append(payload.enterprise_value * 1.1)
-        currents.append(payload.enterprise_value)
-    
-    # Industry Specific
-    if payload.ev_ind_current and payload.ev_ind_avg:
-        categories.append(f'{payload.industry or "Industry"}\nSpecific')
-        lows.append(min(payload.ev_ind_current, payload.ev_ind_avg))
-        highs.append(max(payload.ev_ind_current, payload.ev_ind_avg))
-        currents.append(payload.ev_ind_current)
-    
-    if not categories:
-        # Return empty chart if no data
-        plt.close()
-        return None
-    
-    # Create horizontal bars
-    y_pos = range(len(categories))
-    
-    # Plot ranges as bars
-    for i, (low, high) in enumerate(zip(lows, highs)):
-        ax.barh(i, high - low, left=low, height=0.4, 
-                color='lightblue', alpha=0.4, edgecolor='steelblue')
-    
-    # Plot current values as points
-    ax.scatter(currents, y_pos, color='navy', s=100, zorder=3, marker='o', label='Current')
-    
-    ax.set_yticks(y_pos)
-    ax.set_yticklabels(categories)
-    ax.set_xlabel('Enterprise Value (USD)', fontsize=10)
-    ax.set_title('Valuation Comparison', fontsize=12, fontweight='bold')
-    
-    # Format x-axis as currency
-    ax.xaxis.set_major_formatter(plt.FuncFormatter(lambda x, p: f'${x/1e6:.1f}M'))
-    
-    ax.grid(True, axis='x', alpha=0.3)
-    ax.legend(loc='lower right')
-    
-    plt.tight_layout()
-    
-    # Save to buffer
-    buf = BytesIO()
-    plt.savefig(buf, format='png', dpi=150, bbox_inches='tight')
-    buf.seek(0)
-    plt.close()
-    
-    return buf
-
-def generate_valuation_pdf(payload: ValuationRunIn) -> BytesIO:
-    """Generate a comprehensive PDF report with charts"""
-    buffer = BytesIO()
-    doc = SimpleDocTemplate(
-        buffer, 
-        pagesize=letter,
-        topMargin=0.5*inch,
-        bottomMargin=0.5*inch,
-        leftMargin=0.75*inch,
-        rightMargin=0.75*inch
-    )
-    
-    styles = getSampleStyleSheet()
-    
-    # Custom styles
-    title_style = ParagraphStyle(
-        'CustomTitle',
-        parent=styles['Heading1'],
-        fontSize=22,
-        textColor=colors.HexColor('#1a1a1a'),
-        spaceAfter=6,
-        alignment=1  # Center
-    )
-    
-    subtitle_style = ParagraphStyle(
-        'Subtitle',
-        parent=styles['Normal'],
-        fontSize=10,
-        textColor=colors.HexColor('#666666'),
-        spaceAfter=20,
-        alignment=1
-    )
-    
-    heading_style = ParagraphStyle(
-        'CustomHeading',
-        parent=styles['Heading2'],
-        fontSize=14,
-        textColor=colors.HexColor('#2c5282'),
-        spaceAfter=12,
-        spaceBefore=16,
-        borderWidth=0,
-        borderPadding=0,
-        leftIndent=0
-    )
-    
-    story = []
-    
-    # Header with company info
-    story.append(Paragraph("JORDON VOYTEK CAPITAL PARTNERS", title_style))
-    story.append(Paragraph("Company Valuation Report", subtitle_style))
-    story.append(Spacer(1, 0.2*inch))
-    
-    # Executive Summary Box
-    summary_data = [[Paragraph("<b>EXECUTIVE SUMMARY</b>", styles['Normal'])]]
-    summary_table = Table(summary_data, colWidths=[6.5*inch])
-    summary_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, -1), colors.HexColor('#e6f2ff')),
-        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-        ('FONTSIZE', (0, 0), (-1, -1), 11),
-        ('TOPPADDING', (0, 0), (-1, -1), 8),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
-        ('BOX', (0, 0), (-1, -1), 1, colors.HexColor('#2c5282')),
-    ]))
-    story.append(summary_table)
-    story.append(Spacer(1, 0.1*inch))
-    
-    # Date & Contact Information
-    contact_data = [
-        ['Report Date:', _utcnow_iso().split('T')[0]],
-        ['Contact:', payload.email or 'Not provided'],
-        ['Phone:', payload.phone or 'Not provided'],
-        ['Location:', payload.location or 'Not provided'],
-    ]
-    
-    contact_table = Table(contact_data, colWidths=[1.5*inch, 5*inch])
-    contact_table.setStyle(TableStyle([
-        ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, -1), 9),
-        ('TEXTCOLOR', (0, 0), (0, -1), colors.HexColor('#4a5568')),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 4),
-        ('TOPPADDING', (0, 0), (-1, -1), 4),
-    ]))
-    story.append(contact_table)
-    story.append(Spacer(1, 0.3*inch))
-    
-    # Input Parameters Section
-    story.append(Paragraph("Input Parameters", heading_style))
-    
-    input_data = [
-        ['<b>Parameter</b>', '<b>Value</b>'],
-        ['TTM EBITDA', f"${payload.ebitda:,.0f}"],
-        ['Debt Financing', f"{payload.debt_pct * 100:.1f}%" if payload.debt_pct else "Not specified"],
-        ['Industry', payload.industry or "All-Industry"],
-    ]
-    
-    input_table = Table(input_data, colWidths=[2.5*inch, 4*inch])
-    input_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#2c5282')),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, -1), 10),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
-        ('TOPPADDING', (0, 0), (-1, -1), 8),
-        ('BACKGROUND', (0, 1), (-1, -1), colors.white),
-        ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#f7fafc')]),
-        ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
-    ]))
-    story.append(input_table)
-    story.append(Spacer(1, 0.3*inch))
-    
-    # Valuation Results Section
-    story.append(Paragraph("Estimated Valuation", heading_style))
-    
-    results_data = [
-        ['<b>Metric</b>', '<b>Value</b>'],
-        ['<b>Total Enterprise Value (TEV)</b>', 
-        f"<b>${payload.enterprise_value:,.0f}</b>" if payload.enterprise_value else "N/A"],
-        ['TEV Range', 
-        f"${payload.expected_low:,.0f} - ${payload.expected_high:,.0f}" 
-        if payload.expected_low and payload.expected_high else "N/A"],
-    ]
-    
-    results_table = Table(results_data, colWidths=[2.5*inch, 4*inch])
-    results_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#2c5282')),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, -1), 10),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
-        ('TOPPADDING', (0, 0), (-1, -1), 8),
-        ('BACKGROUND', (0, 1), (-1, -1), colors.white),
-        ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.HexColor('#fff5f5'), colors.white]),
-        ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
-    ]))
-    story.append(results_table)
-    story.append(Spacer(1, 0.3*inch))
-    
-    # Add chart
-    chart_buffer = _create_valuation_chart(payload)
-    if chart_buffer:
-        story.append(Paragraph("Valuation Comparison Chart", heading_style))
-        img = Image(chart_buffer, width=6.5*inch, height=3.25*inch)
-        story.append(img)
-        story.append(Spacer(1, 0.2*inch))
-    
-    # Detailed Breakdown
-    story.append(Paragraph("Valuation Methodology Breakdown", heading_style))
-    
-    methodology_text = """
-    <b>Total Enterprise Value (TEV)</b> reflects the value of a company's core operations—its 
-    equity plus net debt:<br/>
-    <br/>
-    <i>TEV = Market Capitalization + Total Debt − Cash &amp; Cash Equivalents</i><br/>
-    <br/>
-    This valuation uses industry-specific multiples from GF Data and PE cap-stack benchmarks 
-    to estimate your company's value across multiple methodologies.
-    """
-    story.append(Paragraph(methodology_text, styles['Normal']))
-    story.append(Spacer(1, 0.2*inch))
-    
-    # Methodology details table
-    if payload.ev_tev_current or payload.ev_ind_current or payload.ev_pe_stack:
-        method_data = [['<b>Methodology</b>', '<b>Estimated Value</b>']]
-        
-        if payload.ev_pe_stack:
-            method_data.append(['PE Equity Stack', f"${payload.ev_pe_stack:,.0f}"])
-        if payload.ev_tev_current:
-            method_data.append(['All-Industry (Current)', f"${payload.ev_tev_current:,.0f}"])
-        if payload.ev_tev_avg:
-            method_data.append(['All-Industry (5-yr Avg)', f"${payload.ev_tev_avg:,.0f}"])
-        if payload.ev_ind_current:
-            method_data.append([f'{payload.industry} (Current)', f"${payload.ev_ind_current:,.0f}"])
-        if payload.ev_ind_avg:
-            method_data.append([f'{payload.industry} (5-yr Avg)', f"${payload.ev_ind_avg:,.0f}"])
-        
-        method_table = Table(method_data, colWidths=[3*inch, 3.5*inch])
-        method_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#4a5568')),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (0, -1), 'LEFT'),
-            ('ALIGN', (1, 0), (1, -1), 'RIGHT'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, -1), 9),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
-            ('TOPPADDING', (0, 0), (-1, -1), 6),
-            ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#f7fafc')]),
-            ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
-        ]))
-        story.append(method_table)
-        story.append(Spacer(1, 0.3*inch))
-    
-    # Page break before disclaimer
-    story.append(PageBreak())
-    
-    # Important Notice / Disclaimer
-    story.append(Paragraph("Important Legal Notice", heading_style))
-    
-    disclaimer_data = [[Paragraph("""
-    The valuations presented in this report are derived from estimated TEV and public/benchmark 
-    multiples based on private equity transactions occurring in 2025 and over the last 5 years 
-    in your industry. <b>These estimates are directional only.</b><br/>
-    <br/>
-    A more accurate conclusion of value requires an in-depth review of your company's financial 
-    statements (historical and forecast), normalization adjustments, capital structure (net debt 
-    and debt-like items), working-capital targets, industry dynamics, and deal-specific terms.<br/>
-    <br/>
-    <b>The results are not a fairness opinion or appraisal and should not be relied upon as 
-    investment, tax, accounting, or legal advice.</b> Please consult with qualified professionals 
-    before making any business decisions based on this report.
-    """, styles['Normal'])]]
-    
-    disclaimer_table = Table(disclaimer_data, colWidths=[6.5*inch])
-    disclaimer_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, -1), colors.HexColor('#fff5f5')),
-        ('BOX', (0, 0), (-1, -1), 1, colors.HexColor('#e53e3e')),
-        ('TOPPADDING', (0, 0), (-1, -1), 12),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 12),
-        ('LEFTPADDING', (0, 0), (-1, -1), 12),
-        ('RIGHTPADDING', (0, 0), (-1, -1), 12),
-    ]))
-    story.append(disclaimer_table)
-    story.append(Spacer(1, 0.2*inch))
-    
-    # Footer
-    footer_text = """
-    <para alignment="center">
-    <b>Jordon Voytek Capital Partners</b><br/>
-    For questions or to schedule a consultation, please contact us.<br/>
-    © 2025 Jordon Voytek Capital Partners. All rights reserved.
-    </para>
-    """
-    story.append(Spacer(1, 0.3*inch))
-    story.append(Paragraph(footer_text, styles['Normal']))
-    
-    # Build PDF
-    doc.build(story)
-    buffer.seek(0)
-    return buffer
+def _utcnow_iso() -> str:
+    return dt.datetime.now(dt.timezone.utc).isoformat(timespec="seconds")
+
+@app.on_event("startup")
+async def _start_gs_flusher() -> None:
+    # Connect before serving, so no request races the OAuth handshake
+    await run_in_threadpool(sheets.init)
+    app.state.gs_flusher = asyncio.create_task(sheets.run_flusher())
+
+@app.on_event("shutdown")
+async def _stop_gs_flusher() -> None:
+    app.state.gs_flusher.cancel()
+    with contextlib.suppress(asyncio.CancelledError):
+        await app.state.gs_flusher  # let an in-flight flush unwind before the final one
+    await sheets.flush()  # don't drop rows still sitting in the buffer
+    await sheets.aclose()
 
 # -----------------------------------------------------------------------------
 # Utilities to capture metadata
@@ -527,7 +188,8 @@ def generate_valuation_pdf(payload: ValuationRunIn) -> BytesIO:
 def _client_ip(req: Request) -> str:
     xfwd = req.headers.get("x-forwarded-for")
     if xfwd:
-        return xfwd.split(",")[0].strip()
+        head, _, _ = xfwd.partition(",")  # first hop is the client
+        return head.strip()
     return req.client.host if req.client else "unknown"
 
 def _user_agent(req: Request) -> str:
@@ -536,9 +198,22 @@ def _user_agent(req: Request) -> str:
 # -----------------------------------------------------------------------------
 # Pydantic models for logging endpoints
 # -----------------------------------------------------------------------------
+# Plain str + one compiled regex instead of EmailStr: these endpoints only log
+# the address, so email-validator's full RFC/IDNA pass is wasted per request.
+_EMAIL_RE = re.compile(r"[^@\s]+@[^@\s]+\.[^@\s]+")
+
+def _check_email(v: Optional[str]) -> Optional[str]:
+    if v is None:
+        return None
+    v = v.strip()
+    if not _EMAIL_RE.fullmatch(v):
+        raise ValueError("value is not a valid email address")
+    return v
+
 class AccessRequestIn(BaseModel):
-    email: EmailStr
+    email: str
     phone: Optional[str] = None
+    location: Optional[str] = None
     # Optional location hints (only send if user consents)
     lat: Optional[float] = None
     lon: Optional[float] = None
@@ -547,12 +222,17 @@ class AccessRequestIn(BaseModel):
     approx_country: Optional[str] = None
     referrer: Optional[str] = None
 
+    @field_validator("email")
+    @classmethod
+    def validate_email(cls, v: Optional[str]) -> Optional[str]:
+        return _check_email(v)
+
 class ValuationRunIn(BaseModel):
     # Inputs we always know:
     ebitda: float
     debt_pct: Optional[float] = None
     industry: Optional[str] = None
-    email: Optional[EmailStr] = None  # if you have it in the client
+    email: Optional[str] = None  # if you have it in the client
     phone: Optional[str] = None 
     location: Optional[str] = None 
 
@@ -569,6 +249,49 @@ class ValuationRunIn(BaseModel):
     band_label: Optional[str] = None
     notes: Optional[str] = None
 
+    @field_validator("email")
+    @classmethod
+    def validate_email(cls, v: Optional[str]) -> Optional[str]:
+        return _check_email(v)
+
+@dataclass(slots=True)
+class ValuationRow:
+    """One ValuationRuns sheet row. Field order is the column order; "" is a blank cell.
+    Adding a column = one field here (named after its ValuationRunIn field) + one header."""
+    ts: str
+    email: str
+    phone: str
+    location: str
+    ebitda: float
+    debt_pct: float | str
+    industry: str
+    ev_tev_current: float | str
+    ev_tev_avg: float | str
+    ev_ind_current: float | str
+    ev_ind_avg: float | str
+    ev_pe_stack: float | str
+    expected_valuation: float | str
+    expected_low: float | str
+    expected_high: float | str
+    band_label: str
+    notes: str
+
+    @classmethod
+    def from_payload(cls, ts: str, payload: ValuationRunIn) -> ValuationRow:
+        data = payload.model_dump()
+        if data["ev_tev_current"] is None:
+            data["ev_tev_current"] = data["enterprise_value"]
+        return cls(ts, *("" if data[k] is None else data[k] for k in _VALUATION_ROW_FIELDS))
+
+_VALUATION_ROW_FIELDS = tuple(f.name for f in fields(ValuationRow))[1:]  # all but ts
+
+VALUATION_HEADERS = [
+    "Timestamp", "Email", "Phone", "Location", "EBITDA", "Debt %", "Industry",
+    "EV TEV Current", "EV TEV Avg", "EV Ind Current", "EV Ind Avg",
+    "EV PE Stack", "Expected Valuation", "Expected Low", "Expected High",
+    "Band Label", "Notes"
+]
+
 # -----------------------------------------------------------------------------
 # API endpoints
 # -----------------------------------------------------------------------------
@@ -576,17 +299,18 @@ class ValuationRunIn(BaseModel):
 @app.get("/debug/env")
 async def debug_env():
     return {
-        "GSHEET_SPREADSHEET_KEY": bool(os.getenv("GSHEET_SPREADSHEET_KEY")),
-        "GOOGLE_SERVICE_ACCOUNT_FILE": os.getenv("GOOGLE_SERVICE_ACCOUNT_FILE"),
-        "GOOGLE_SERVICE_ACCOUNT_JSON": bool(os.getenv("GOOGLE_SERVICE_ACCOUNT_JSON")),
+        "GSHEET_SPREADSHEET_KEY": bool(sheets.GSHEET_SPREADSHEET_KEY),
+        "GOOGLE_SERVICE_ACCOUNT_FILE": sheets.GOOGLE_SERVICE_ACCOUNT_FILE,
+        "GOOGLE_SERVICE_ACCOUNT_JSON": bool(sheets.GOOGLE_SERVICE_ACCOUNT_JSON),
     }
 
 @app.post("/log/access")
 async def log_access(req: Request, payload: AccessRequestIn):
+    ts = _utcnow_iso()
     ip = _client_ip(req)
     ua = _user_agent(req)
     row = [
-        _utcnow_iso(),
+        ts,
         payload.email,
         payload.phone or "",
         payload.location or "",
@@ -605,81 +329,208 @@ async def log_access(req: Request, payload: AccessRequestIn):
         "City", "Region", "Country", "Latitude", "Longitude", "Referrer"
     ]
     
-    _gs_append_row("AccessRequests", row, headers)
+    sheets.enqueue_row("AccessRequests", row, headers)
     
     # Send email notification...
     return {"ok": True}
 
-@app.post("/log/valuation")
-async def log_valuation(payload: ValuationRunIn):
-    row = [
-        _utcnow_iso(),
-        payload.email or "",
-        payload.phone or "",
-        payload.location or "",
-        payload.ebitda,
-        payload.debt_pct if payload.debt_pct is not None else "",
-        payload.industry or "",
-        payload.ev_tev_current if payload.ev_tev_current is not None else payload.enterprise_value or "",
-        payload.ev_tev_avg or "",
-        payload.ev_ind_current or "",
-        payload.ev_ind_avg or "",
-        payload.ev_pe_stack or "",
-        payload.expected_valuation or "",
-        payload.expected_low or "",
-        payload.expected_high or "",
-        payload.band_label or "",
-        payload.notes or "",
-    ]
-    
-    headers = [
-        "Timestamp", "Email", "Phone", "Location", "EBITDA", "Debt %", "Industry",
-        "EV TEV Current", "EV TEV Avg", "EV Ind Current", "EV Ind Avg",
-        "EV PE Stack", "Expected Valuation", "Expected Low", "Expected High",
-        "Band Label", "Notes"
-    ]
-    
-    _gs_append_row("ValuationRuns", row, headers)
-
-    # Generate PDF report
-    pdf_buffer = generate_valuation_pdf(payload)
-    
-    # Send email notification...
-    # Format values safely before using them in the email
-    ev_formatted = f"${payload.enterprise_value:,.0f}" if payload.enterprise_value else "N/A"
-    expected_formatted = f"${payload.expected_valuation:,.0f}" if payload.expected_valuation else "N/A"
-    expected_low_formatted = f"${payload.expected_low:,.0f}" if payload.expected_low else "N/A"
-    expected_high_formatted = f"${payload.expected_high:,.0f}" if payload.expected_high else "N/A"
-    ebitda_formatted = f"${payload.ebitda:,.0f}"
-    debt_pct_formatted = f"{payload.debt_pct * 100:.0f}%" if payload.debt_pct else "N/A"
-    
-    send_notification_email(
-        subject=f"New Valuation: {payload.email or 'Unknown User'}",
-        body=f"""
-        <h3>New Valuation Completed</h3>
-        <p><strong>Email:</strong> {payload.email or 'Not provided'}</p>
-        <p><strong>Phone:</strong> {payload.phone or 'Not provided'}</p>
-        <p><strong>Location:</strong> {payload.location or 'Not provided'}</p>
-        <p><strong>Time:</strong> {_utcnow_iso()}</p>
+# One valuation run in the digest email; filled with str.format_map
+VALUATION_EMAIL_TMPL = """
+        <p><strong>Email:</strong> {email}</p>
+        <p><strong>Phone:</strong> {phone}</p>
+        <p><strong>Location:</strong> {location}</p>
+        <p><strong>Time:</strong> {ts}</p>
         
         <h4>Inputs:</h4>
         <ul>
-            <li><strong>EBITDA:</strong> {ebitda_formatted}</li>
-            <li><strong>Debt %:</strong> {debt_pct_formatted}</li>
-            <li><strong>Industry:</strong> {payload.industry or 'Not specified'}</li>
+            <li><strong>EBITDA:</strong> {ebitda}</li>
+            <li><strong>Debt %:</strong> {debt_pct}</li>
+            <li><strong>Industry:</strong> {industry}</li>
         </ul>
         
         <h4>Results:</h4>
         <ul>
-            <li><strong>Total Enterprise Value (TEV):</strong> {ev_formatted}</li>
-            <li><strong>TEV Range:</strong> {expected_low_formatted} - {expected_high_formatted}</li>
+            <li><strong>Total Enterprise Value (TEV):</strong> {enterprise_value}</li>
+            <li><strong>TEV Range:</strong> {expected_low} - {expected_high}</li>
         </ul>
+        """
+
+def _valuation_email_section(payload: ValuationRunIn, ts: str) -> str:
+    """HTML block describing one valuation run."""
+    # Format values safely before using them in the email
+    return VALUATION_EMAIL_TMPL.format_map({
+        "email": payload.email or 'Not provided',
+        "phone": payload.phone or 'Not provided',
+        "location": payload.location or 'Not provided',
+        "ts": ts,
+        "ebitda": f"${payload.ebitda:,.0f}",
+        "debt_pct": f"{payload.debt_pct * 100:.0f}%" if payload.debt_pct else "N/A",
+        "industry": payload.industry or 'Not specified',
+        "enterprise_value": f"${payload.enterprise_value:,.0f}" if payload.enterprise_value else "N/A",
+        "expected_low": f"${payload.expected_low:,.0f}" if payload.expected_low else "N/A",
+        "expected_high": f"${payload.expected_high:,.0f}" if payload.expected_high else "N/A",
+    })
+
+# Valuation notifications go out as periodic digests (one email, one PDF per
+# run) rather than one SendGrid call per /log/valuation.
+DIGEST_INTERVAL = float(os.getenv("NOTIFICATION_DIGEST_INTERVAL", "300"))  # seconds
+DIGEST_MAX_ITEMS = int(os.getenv("NOTIFICATION_DIGEST_MAX", "10"))  # send early past this; runs per email
+DIGEST_MAX_BUFFER = int(os.getenv("NOTIFICATION_DIGEST_MAX_BUFFER", "200"))  # oldest runs dropped past this
+DIGEST_MAX_ATTEMPTS = int(os.getenv("NOTIFICATION_DIGEST_MAX_ATTEMPTS", "5"))  # failed sends before a digest is dropped
+_DIGEST_MAX_BACKOFF = 3600.0  # seconds
+
+@dataclass(slots=True, eq=False)
+class _DigestItem:
+    ts: str
+    payload: ValuationRunIn
+    pdf: Optional[bytes] = None  # rendered once, on the first send attempt; b"" if rendering failed
+
+_digest_buffer: List[_DigestItem] = []
+_digest_lock = asyncio.Lock()
+_digest_now = asyncio.Event()
+_digest_failures = 0  # consecutive failed sends
+
+def _queue_for_digest(ts: str, payload: ValuationRunIn) -> None:
+    if len(_digest_buffer) >= DIGEST_MAX_BUFFER:
+        dropped = _digest_buffer.pop(0)
+        LOG.error("Digest buffer full; dropping valuation at %s", dropped.ts)
+    _digest_buffer.append(_DigestItem(ts, payload))
+    if len(_digest_buffer) >= DIGEST_MAX_ITEMS:
+        _digest_now.set()
+
+def _render_pdf(payload: ValuationRunIn, ts: str) -> bytes:
+    # ReportLab is imported on first use (on a worker thread), not at startup
+    from .report import generate_valuation_pdf
+    return generate_valuation_pdf(payload, ts).getvalue()
+
+async def _send_digest() -> bool:
+    """Email up to DIGEST_MAX_ITEMS buffered valuations in one message, with each PDF
+    attached. Returns False if the email could not be sent."""
+    global _digest_failures
+    async with _digest_lock:
+        # Items leave the buffer only once the email is out (or after
+        # DIGEST_MAX_ATTEMPTS failures): a failed send, or a cancel mid-send,
+        # leaves them for the next digest.
+        items = _digest_buffer[:DIGEST_MAX_ITEMS]
+        if not items:
+            return True
+
+        attachments = []
+        for item in items:
+            if item.pdf is None:
+                try:
+                    # PDF rendering is CPU-bound, so off the event loop
+                    item.pdf = await run_in_threadpool(_render_pdf, item.payload, item.ts)
+                except Exception:
+                    # One bad report shouldn't cost the rest; the run is still in the email body
+                    LOG.exception("PDF render failed for valuation at %s", item.ts)
+                    item.pdf = b""
+            if item.pdf:
+                attachments.append((
+                    f"valuation_report_{item.payload.email or 'user'}_{item.ts.partition('T')[0]}.pdf",
+                    BytesIO(item.pdf),
+                ))
+
+        if len(items) == 1:
+            subject = f"New Valuation: {items[0].payload.email or 'Unknown User'}"
+            heading = "New Valuation Completed"
+        else:
+            subject = f"{len(items)} New Valuations"
+            heading = f"{len(items)} New Valuations Completed"
+        sections = "<hr/>".join(_valuation_email_section(item.payload, item.ts) for item in items)
+
+        sent = await send_notification_email(
+            subject=subject,
+            body=f"<h3>{heading}</h3>{sections}",
+            attachments=attachments,
+        )
+        if sent:
+            _digest_failures = 0
+        else:
+            _digest_failures += 1
+            if _digest_failures < DIGEST_MAX_ATTEMPTS:
+                LOG.warning("Digest of %d valuation(s) kept for retry (attempt %d)", len(items), _digest_failures)
+                return False
+            LOG.error("Dropping digest of %d valuation(s) after %d failed sends", len(items), _digest_failures)
+            _digest_failures = 0
+        # The buffer may have shifted meanwhile (overflow drops), so remove by identity
+        done = {id(item) for item in items}
+        _digest_buffer[:] = [item for item in _digest_buffer if id(item) not in done]
+        if len(_digest_buffer) >= DIGEST_MAX_ITEMS:
+            _digest_now.set()  # more than one email's worth was waiting
+        return sent
+
+async def _run_digests() -> None:
+    """Send a digest every DIGEST_INTERVAL seconds, or sooner when the buffer fills up.
+    After a failed send, wait DIGEST_INTERVAL, doubling per failure, before retrying."""
+    while True:
+        if _digest_failures:
+            # New runs don't trigger an early retry while SendGrid is failing
+            await asyncio.sleep(min(DIGEST_INTERVAL * 2 ** (_digest_failures - 1), _DIGEST_MAX_BACKOFF))
+        else:
+            try:
+                await asyncio.wait_for(_digest_now.wait(), timeout=DIGEST_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+        _digest_now.clear()
+        try:
+            await _send_digest()
+        except Exception as e:
+            LOG.exception("Email digest failed: %s", e)
+
+@app.on_event("startup")
+async def _start_digests() -> None:
+    app.state.digests = asyncio.create_task(_run_digests())
+
+@app.on_event("shutdown")
+async def _stop_digests() -> None:
+    app.state.digests.cancel()
+    with contextlib.suppress(asyncio.CancelledError):
+        await app.state.digests  # let an in-flight digest unwind before the final one
+    # Don't drop valuations still waiting for a digest (one email per DIGEST_MAX_ITEMS)
+    while _digest_buffer and await _send_digest():
+        pass
+    if _sendgrid_http is not None:
+        await _sendgrid_http.aclose()  # only after the final digest is out
+
+# A double-click on "compute" posts the same run twice; repeats of a row seen
+# within DEDUP_WINDOW seconds are acknowledged but not logged or emailed again.
+DEDUP_WINDOW = float(os.getenv("LOG_DEDUP_WINDOW", "5"))  # seconds
+_DEDUP_SWEEP_AGE = 60.0  # forget entries older than this
+_recent_runs: Dict[Tuple[str, str, int], float] = {}  # (email, client, row hash) -> first seen
+_last_dedup_sweep = 0.0
+
+def _is_duplicate_run(email: Optional[str], client: str, row: Sequence[Any]) -> bool:
+    """client identifies an anonymous caller (IP + user agent); it's ignored when email is set."""
+    global _last_dedup_sweep
+    now = time.monotonic()
+    if now - _last_dedup_sweep > _DEDUP_SWEEP_AGE:
+        for k, seen_at in list(_recent_runs.items()):
+            if now - seen_at > _DEDUP_SWEEP_AGE:
+                del _recent_runs[k]
+        _last_dedup_sweep = now
+
+    # Anonymous runs key on the caller too, so two visitors entering the same
+    # numbers aren't merged into one
+    key = (email, "", hash(tuple(row[1:]))) if email else ("", client, hash(tuple(row[1:])))  # row[0] is the timestamp
+    seen_at = _recent_runs.get(key)
+    if seen_at is not None and now - seen_at < DEDUP_WINDOW:
+        return True
+    _recent_runs[key] = now
+    return False
+
+@app.post("/log/valuation")
+async def log_valuation(req: Request, payload: ValuationRunIn):
+    ts = _utcnow_iso()  # one timestamp for the sheet row, email and PDF
+    row = astuple(ValuationRow.from_payload(ts, payload))
+    if _is_duplicate_run(payload.email, f"{_client_ip(req)} {_user_agent(req)}", row):
+        return {"ok": True, "deduped": True}
+
+    sheets.enqueue_row("ValuationRuns", row, VALUATION_HEADERS)
+
+    # PDF + email go out with the next digest
+    _queue_for_digest(ts, payload)
 
-        """,
-        attachment_data=pdf_buffer,
-        attachment_name=f"valuation_report_{payload.email or 'user'}_{_utcnow_iso().split('T')[0]}.pdf"
-    )
-    
     return {"ok": True}
 
 @app.post("/compute-valuation")
@@ -687,5 +538,5 @@ async def compute(payload: ValuationInput):
     """
     Your existing valuation endpoint.
     """
-    result = compute_valuation(payload)
+    result = compute_valuation(payload)  # cached table lookups and arithmetic; cheaper than a thread hop
     return result
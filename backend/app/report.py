@@ -0,0 +1,385 @@
+# backend/app/report.py
+# Valuation PDF report. Imported lazily by main.py the first time a digest
+# renders, so ReportLab stays out of worker startup.
+from __future__ import annotations
+
+from io import BytesIO
+from functools import lru_cache
+from typing import TYPE_CHECKING, Optional, Sequence, Tuple
+
+from reportlab.lib.pagesizes import letter
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.lib.units import inch
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, PageBreak
+from reportlab.lib import colors
+from reportlab.graphics.shapes import Drawing, Rect, Circle, Line, String
+
+if TYPE_CHECKING:
+    from .main import ValuationRunIn
+
+# -----------------------------------------------------------------------------
+# Chart
+# -----------------------------------------------------------------------------
+def _create_valuation_chart(payload: ValuationRunIn) -> Optional[Drawing]:
+    """Create a horizontal bar chart showing valuation ranges"""
+    # A refresh / re-submit produces the same series; only those are cached. The
+    # Drawing is a flowable that platypus marks up during build, so it's always new.
+    series = _chart_series(
+        payload.ev_pe_stack, payload.ebitda,
+        payload.ev_tev_current, payload.ev_tev_avg, payload.enterprise_value,
+        payload.ev_ind_current, payload.ev_ind_avg, payload.industry,
+    )
+    if series is None:
+        return None
+    return _draw_valuation_chart(*series)
+
+ChartSeries = Tuple[Tuple[str, ...], Tuple[float, ...], Tuple[float, ...], Tuple[float, ...]]
+
+@lru_cache(maxsize=256)
+def _chart_series(ev_pe_stack: Optional[float], ebitda: float,
+                  ev_tev_current: Optional[float], ev_tev_avg: Optional[float],
+                  enterprise_value: Optional[float],
+                  ev_ind_current: Optional[float], ev_ind_avg: Optional[float],
+                  industry: Optional[str]) -> Optional[ChartSeries]:
+    """(categories, lows, highs, currents) for the chart, or None if there's nothing to plot."""
+    categories = []
+    lows = []
+    highs = []
+    currents = []
+    
+    # PE Stack
+    pe_val = ev_pe_stack or (ebitda * 5.92) if ebitda else None
+    if pe_val:
+        categories.append('PE Equity Stack')
+        lows.append(pe_val)
+        highs.append(pe_val)
+        currents.append(pe_val)
+    
+    # TEV Band
+    if ev_tev_current and ev_tev_avg:
+        categories.append('All-Industry\n(TEV Band)')
+        lows.append(min(ev_tev_current, ev_tev_avg))
+        highs.append(max(ev_tev_current, ev_tev_avg))
+        currents.append(ev_tev_current)
+    elif enterprise_value:
+        categories.append('All-Industry\n(TEV Band)')
+        lows.append(enterprise_value * 0.9)
+        highs.append(enterprise_value * 1.1)
+        currents.append(enterprise_value)
+    
+    # Industry Specific
+    if ev_ind_current and ev_ind_avg:
+        categories.append(f'{industry or "Industry"}\nSpecific')
+        lows.append(min(ev_ind_current, ev_ind_avg))
+        highs.append(max(ev_ind_current, ev_ind_avg))
+        currents.append(ev_ind_current)
+    
+    if not categories:
+        # Return empty chart if no data
+        return None
+    
+    return tuple(categories), tuple(lows), tuple(highs), tuple(currents)
+
+# Chart geometry, in points: 6.5in x 3.25in to match the page's content width
+_CHART_W, _CHART_H = 468, 234
+_PLOT_LEFT, _PLOT_RIGHT, _PLOT_BOTTOM, _PLOT_TOP = 100, 452, 42, 206
+_BAR_FILL = colors.Color(0.678, 0.847, 0.902, alpha=0.4)  # lightblue @ 40%
+_BAR_EDGE = colors.HexColor('#4682b4')  # steelblue
+_GRID = colors.Color(0, 0, 0, alpha=0.15)
+
+def _draw_valuation_chart(categories: Sequence[str], lows: Sequence[float], highs: Sequence[float],
+                          currents: Sequence[float]) -> Drawing:
+    """Draw the range bars and current-value markers as native PDF vector shapes."""
+    d = Drawing(_CHART_W, _CHART_H)
+
+    # Value axis range, padded so end markers aren't clipped
+    vmin, vmax = min(lows), max(highs)
+    span = (vmax - vmin) or (abs(vmax) * 0.2) or 1.0
+    x0, x1 = max(0.0, vmin - 0.1 * span), vmax + 0.1 * span
+    plot_w = _PLOT_RIGHT - _PLOT_LEFT
+    def x_of(v: float) -> float:
+        return _PLOT_LEFT + (v - x0) / (x1 - x0) * plot_w
+
+    # Grid + currency tick labels
+    for k in range(6):
+        v = x0 + (x1 - x0) * k / 5
+        x = x_of(v)
+        d.add(Line(x, _PLOT_BOTTOM, x, _PLOT_TOP, strokeColor=_GRID, strokeWidth=0.5))
+        d.add(String(x, _PLOT_BOTTOM - 12, f'${v/1e6:.1f}M', fontSize=7, textAnchor='middle'))
+    d.add(Line(_PLOT_LEFT, _PLOT_BOTTOM, _PLOT_RIGHT, _PLOT_BOTTOM, strokeColor=colors.black, strokeWidth=0.5))
+
+    # One row per category, first at the bottom
+    row_h = (_PLOT_TOP - _PLOT_BOTTOM) / len(categories)
+    for i, (label, low, high, current) in enumerate(zip(categories, lows, highs, currents)):
+        y = _PLOT_BOTTOM + (i + 0.5) * row_h
+        bar_h = 0.4 * row_h
+        d.add(Rect(x_of(low), y - bar_h / 2, max(x_of(high) - x_of(low), 0.5), bar_h,
+                   fillColor=_BAR_FILL, strokeColor=_BAR_EDGE, strokeWidth=0.75))
+        d.add(Circle(x_of(current), y, 4.5, fillColor=colors.navy, strokeColor=colors.navy))
+        lines = label.split('\n')
+        for j, line in enumerate(lines):
+            d.add(String(_PLOT_LEFT - 6, y + (len(lines) / 2 - j - 0.8) * 9, line,
+                         fontSize=8, textAnchor='end'))
+
+    # Titles + legend
+    d.add(String(_CHART_W / 2, _CHART_H - 14, 'Valuation Comparison',
+                 fontName='Helvetica-Bold', fontSize=11, textAnchor='middle'))
+    d.add(String((_PLOT_LEFT + _PLOT_RIGHT) / 2, 8, 'Enterprise Value (USD)',
+                 fontSize=9, textAnchor='middle'))
+    d.add(Circle(_PLOT_RIGHT - 44, _PLOT_BOTTOM + 10, 3.5, fillColor=colors.navy, strokeColor=colors.navy))
+    d.add(String(_PLOT_RIGHT - 36, _PLOT_BOTTOM + 7, 'Current', fontSize=8))
+
+    return d
+
+# -----------------------------------------------------------------------------
+# Report
+# -----------------------------------------------------------------------------
+# Input-independent styles and text, built once at import. Only styles are
+# shared: platypus mutates flowables during build (wrap/split state, _postponed),
+# so every Paragraph / Table is created per document.
+_STYLES = getSampleStyleSheet()
+
+_TITLE_STYLE = ParagraphStyle(
+    'CustomTitle',
+    parent=_STYLES['Heading1'],
+    fontSize=22,
+    textColor=colors.HexColor('#1a1a1a'),
+    spaceAfter=6,
+    alignment=1  # Center
+)
+
+_SUBTITLE_STYLE = ParagraphStyle(
+    'Subtitle',
+    parent=_STYLES['Normal'],
+    fontSize=10,
+    textColor=colors.HexColor('#666666'),
+    spaceAfter=20,
+    alignment=1
+)
+
+_HEADING_STYLE = ParagraphStyle(
+    'CustomHeading',
+    parent=_STYLES['Heading2'],
+    fontSize=14,
+    textColor=colors.HexColor('#2c5282'),
+    spaceAfter=12,
+    spaceBefore=16,
+    borderWidth=0,
+    borderPadding=0,
+    leftIndent=0
+)
+
+_CONTACT_TABLE_STYLE = TableStyle([
+    ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, -1), 9),
+    ('TEXTCOLOR', (0, 0), (0, -1), colors.HexColor('#4a5568')),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 4),
+    ('TOPPADDING', (0, 0), (-1, -1), 4),
+])
+
+_INPUT_TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#2c5282')),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+    ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, -1), 10),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
+    ('TOPPADDING', (0, 0), (-1, -1), 8),
+    ('BACKGROUND', (0, 1), (-1, -1), colors.white),
+    ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#f7fafc')]),
+    ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
+])
+
+_RESULTS_TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#2c5282')),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+    ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, -1), 10),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
+    ('TOPPADDING', (0, 0), (-1, -1), 8),
+    ('BACKGROUND', (0, 1), (-1, -1), colors.white),
+    ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.HexColor('#fff5f5'), colors.white]),
+    ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
+])
+
+_METHOD_TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#4a5568')),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+    ('ALIGN', (0, 0), (0, -1), 'LEFT'),
+    ('ALIGN', (1, 0), (1, -1), 'RIGHT'),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, -1), 9),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
+    ('TOPPADDING', (0, 0), (-1, -1), 6),
+    ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#f7fafc')]),
+    ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
+])
+
+_SUMMARY_TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, -1), colors.HexColor('#e6f2ff')),
+    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+    ('FONTSIZE', (0, 0), (-1, -1), 11),
+    ('TOPPADDING', (0, 0), (-1, -1), 8),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
+    ('BOX', (0, 0), (-1, -1), 1, colors.HexColor('#2c5282')),
+])
+
+_DISCLAIMER_TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, -1), colors.HexColor('#fff5f5')),
+    ('BOX', (0, 0), (-1, -1), 1, colors.HexColor('#e53e3e')),
+    ('TOPPADDING', (0, 0), (-1, -1), 12),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 12),
+    ('LEFTPADDING', (0, 0), (-1, -1), 12),
+    ('RIGHTPADDING', (0, 0), (-1, -1), 12),
+])
+
+_METHODOLOGY_TEXT = """
+<b>Total Enterprise Value (TEV)</b> reflects the value of a company's core operations—its 
+equity plus net debt:<br/>
+<br/>
+<i>TEV = Market Capitalization + Total Debt − Cash &amp; Cash Equivalents</i><br/>
+<br/>
+This valuation uses industry-specific multiples from GF Data and PE cap-stack benchmarks 
+to estimate your company's value across multiple methodologies.
+"""
+
+_DISCLAIMER_TEXT = """
+The valuations presented in this report are derived from estimated TEV and public/benchmark 
+multiples based on private equity transactions occurring in 2025 and over the last 5 years 
+in your industry. <b>These estimates are directional only.</b><br/>
+<br/>
+A more accurate conclusion of value requires an in-depth review of your company's financial 
+statements (historical and forecast), normalization adjustments, capital structure (net debt 
+and debt-like items), working-capital targets, industry dynamics, and deal-specific terms.<br/>
+<br/>
+<b>The results are not a fairness opinion or appraisal and should not be relied upon as 
+investment, tax, accounting, or legal advice.</b> Please consult with qualified professionals 
+before making any business decisions based on this report.
+"""
+
+_FOOTER_TEXT = """
+<para alignment="center">
+<b>Jordon Voytek Capital Partners</b><br/>
+For questions or to schedule a consultation, please contact us.<br/>
+© 2025 Jordon Voytek Capital Partners. All rights reserved.
+</para>
+"""
+
+def generate_valuation_pdf(payload: ValuationRunIn, ts: str) -> BytesIO:
+    """Generate a comprehensive PDF report with charts; ts is the run's logged timestamp."""
+    buffer = BytesIO()
+    doc = SimpleDocTemplate(
+        buffer, 
+        pagesize=letter,
+        topMargin=0.5*inch,
+        bottomMargin=0.5*inch,
+        leftMargin=0.75*inch,
+        rightMargin=0.75*inch,
+        pageCompression=1,  # zlib page streams; don't depend on rl_config defaults
+    )
+    
+    story = []
+    
+    # Header with company info
+    story.append(Paragraph("JORDON VOYTEK CAPITAL PARTNERS", _TITLE_STYLE))
+    story.append(Paragraph("Company Valuation Report", _SUBTITLE_STYLE))
+    story.append(Spacer(1, 0.2*inch))
+    
+    # Executive Summary Box
+    summary_table = Table([[Paragraph("<b>EXECUTIVE SUMMARY</b>", _STYLES['Normal'])]], colWidths=[6.5*inch])
+    summary_table.setStyle(_SUMMARY_TABLE_STYLE)
+    story.append(summary_table)
+    story.append(Spacer(1, 0.1*inch))
+    
+    # Date & Contact Information
+    contact_data = [
+        ['Report Date:', ts.partition('T')[0]],
+        ['Contact:', payload.email or 'Not provided'],
+        ['Phone:', payload.phone or 'Not provided'],
+        ['Location:', payload.location or 'Not provided'],
+    ]
+    
+    contact_table = Table(contact_data, colWidths=[1.5*inch, 5*inch])
+    contact_table.setStyle(_CONTACT_TABLE_STYLE)
+    story.append(contact_table)
+    story.append(Spacer(1, 0.3*inch))
+    
+    # Input Parameters Section
+    story.append(Paragraph("Input Parameters", _HEADING_STYLE))
+    
+    input_data = [
+        ['<b>Parameter</b>', '<b>Value</b>'],
+        ['TTM EBITDA', f"${payload.ebitda:,.0f}"],
+        ['Debt Financing', f"{payload.debt_pct * 100:.1f}%" if payload.debt_pct else "Not specified"],
+        ['Industry', payload.industry or "All-Industry"],
+    ]
+    
+    input_table = Table(input_data, colWidths=[2.5*inch, 4*inch])
+    input_table.setStyle(_INPUT_TABLE_STYLE)
+    story.append(input_table)
+    story.append(Spacer(1, 0.3*inch))
+    
+    # Valuation Results Section
+    story.append(Paragraph("Estimated Valuation", _HEADING_STYLE))
+    
+    results_data = [
+        ['<b>Metric</b>', '<b>Value</b>'],
+        ['<b>Total Enterprise Value (TEV)</b>', 
+        f"<b>${payload.enterprise_value:,.0f}</b>" if payload.enterprise_value else "N/A"],
+        ['TEV Range', 
+        f"${payload.expected_low:,.0f} - ${payload.expected_high:,.0f}" 
+        if payload.expected_low and payload.expected_high else "N/A"],
+    ]
+    
+    results_table = Table(results_data, colWidths=[2.5*inch, 4*inch])
+    results_table.setStyle(_RESULTS_TABLE_STYLE)
+    story.append(results_table)
+    story.append(Spacer(1, 0.3*inch))
+    
+    # Add chart
+    chart = _create_valuation_chart(payload)
+    if chart is not None:
+        story.append(Paragraph("Valuation Comparison Chart", _HEADING_STYLE))
+        story.append(chart)
+        story.append(Spacer(1, 0.2*inch))
+    
+    # Detailed Breakdown
+    story.append(Paragraph("Valuation Methodology Breakdown", _HEADING_STYLE))
+    story.append(Paragraph(_METHODOLOGY_TEXT, _STYLES['Normal']))
+    story.append(Spacer(1, 0.2*inch))
+    
+    # Methodology details table
+    if payload.ev_tev_current or payload.ev_ind_current or payload.ev_pe_stack:
+        method_data = [['<b>Methodology</b>', '<b>Estimated Value</b>']]
+        
+        if payload.ev_pe_stack:
+            method_data.append(['PE Equity Stack', f"${payload.ev_pe_stack:,.0f}"])
+        if payload.ev_tev_current:
+            method_data.append(['All-Industry (Current)', f"${payload.ev_tev_current:,.0f}"])
+        if payload.ev_tev_avg:
+            method_data.append(['All-Industry (5-yr Avg)', f"${payload.ev_tev_avg:,.0f}"])
+        if payload.ev_ind_current:
+            method_data.append([f'{payload.industry} (Current)', f"${payload.ev_ind_current:,.0f}"])
+        if payload.ev_ind_avg:
+            method_data.append([f'{payload.industry} (5-yr Avg)', f"${payload.ev_ind_avg:,.0f}"])
+        
+        method_table = Table(method_data, colWidths=[3*inch, 3.5*inch])
+        method_table.setStyle(_METHOD_TABLE_STYLE)
+        story.append(method_table)
+        story.append(Spacer(1, 0.3*inch))
+    
+    # Page break before disclaimer
+    story.append(PageBreak())
+    story.append(Paragraph("Important Legal Notice", _HEADING_STYLE))
+    disclaimer_table = Table([[Paragraph(_DISCLAIMER_TEXT, _STYLES['Normal'])]], colWidths=[6.5*inch])
+    disclaimer_table.setStyle(_DISCLAIMER_TABLE_STYLE)
+    story.append(disclaimer_table)
+    story.append(Spacer(1, 0.2*inch))
+    story.append(Spacer(1, 0.3*inch))
+    story.append(Paragraph(_FOOTER_TEXT, _STYLES['Normal']))
+    
+    # Build PDF
+    doc.build(story)
+    buffer.seek(0)
+    return buffer
@@ -0,0 +1,340 @@
+# backend/app/sheets.py
+# Google Sheets logging (no-op if not configured). gspread / google-auth are
+# imported by init(), so importing this module stays cheap.
+from __future__ import annotations
+
+import os
+import re
+import json
+import gzip
+import asyncio
+import logging
+import threading
+import datetime as dt
+from collections import defaultdict, deque
+from typing import Optional, List, Any, Dict, Deque, Callable, Awaitable, Tuple, Sequence, Set
+
+import httpx
+import orjson
+from fastapi.concurrency import run_in_threadpool
+
+LOG = logging.getLogger("app.sheets")  # handlers are set up by main.py
+
+# -----------------------------------------------------------------------------
+# Client setup
+# -----------------------------------------------------------------------------
+GOOGLE_SERVICE_ACCOUNT_JSON = os.getenv("GOOGLE_SERVICE_ACCOUNT_JSON")
+GOOGLE_SERVICE_ACCOUNT_FILE = os.getenv("GOOGLE_SERVICE_ACCOUNT_FILE")
+GSHEET_SPREADSHEET_KEY = os.getenv("GSHEET_SPREADSHEET_KEY")
+GSHEET_NAME = os.getenv("GSHEET_NAME", "JVCP Valuation Logs")
+
+_READY = False
+_init_lock = threading.Lock()
+_client = None
+_sheet = None
+_creds = None
+_ws_cache: Dict[str, Any] = {}  # worksheet name -> gspread.Worksheet, resolved once
+_ws_lock = threading.Lock()  # guards lookup/creation so a worksheet is added at most once
+
+def _mount_pool(client: Any) -> None:
+    """Give gspread's session a larger keep-alive pool and retry 429/5xx with backoff."""
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+
+    # gspread 6 keeps the session on client.http_client, gspread 5 on the client itself
+    session = getattr(getattr(client, "http_client", client), "session", None)
+    if session is None:
+        return
+    retry = Retry(
+        total=5,
+        backoff_factor=1.5,
+        status_forcelist=[429, 500, 502, 503, 504],
+        allowed_methods=None,  # appends are POSTs; retry them too
+        respect_retry_after_header=True,
+        raise_on_status=False,  # hand the final response back so gspread raises APIError
+    )
+    session.mount("https://", HTTPAdapter(pool_connections=20, pool_maxsize=50, max_retries=retry))
+
+def init() -> None:
+    """Initialize gspread client once per process. If not configured, remain no-op.
+    Runs from the app's startup hook; the lock keeps a racing caller from
+    repeating the OAuth handshake."""
+    global _READY, _client, _sheet, _creds
+    if _READY:  # already tried
+        return
+    with _init_lock:
+        if _READY:
+            return
+        try:
+            import gspread  # type: ignore
+            from google.oauth2.service_account import Credentials  # type: ignore
+
+            scopes = ["https://www.googleapis.com/auth/spreadsheets"]
+            key_json = GOOGLE_SERVICE_ACCOUNT_JSON
+            key_path = GOOGLE_SERVICE_ACCOUNT_FILE
+            spreadsheet_key = GSHEET_SPREADSHEET_KEY
+            spreadsheet_name = GSHEET_NAME
+
+            if not (key_json or key_path):
+                # Not configured; stay as no-op
+                LOG.info("No credentials configured - logging disabled")
+                return
+
+            if key_json:
+                info = json.loads(key_json)
+                creds = Credentials.from_service_account_info(info, scopes=scopes)
+            else:
+                creds = Credentials.from_service_account_file(key_path, scopes=scopes)
+
+            _creds = creds
+            _client = gspread.authorize(creds)
+            _mount_pool(_client)
+            if spreadsheet_key:
+                _sheet = _client.open_by_key(spreadsheet_key)
+            else:
+                _sheet = _client.open(spreadsheet_name)
+
+            LOG.info("Successfully connected to spreadsheet")
+        except Exception as e:
+            # Log the actual error so you can debug
+            LOG.error("Failed to initialize: %s", e)
+            _client = None
+            _sheet = None
+            _creds = None
+        finally:
+            _READY = True  # one attempt per process, successful or not
+
+def _resolve_worksheet(worksheet_name: str) -> bool:
+    """Look up (or create) a worksheet once per process; True if it was just created."""
+    with _ws_lock:
+        if worksheet_name in _ws_cache:  # resolved by another caller meanwhile
+            return False
+        created = False
+        try:
+            ws = _sheet.worksheet(worksheet_name)
+        except Exception:
+            ws = _sheet.add_worksheet(title=worksheet_name, rows=1000, cols=26)
+            created = True
+        _ws_cache[worksheet_name] = ws
+        return created
+
+# -----------------------------------------------------------------------------
+# REST appends
+# -----------------------------------------------------------------------------
+# Appends skip gspread and hit spreadsheets.batchUpdate directly: one pooled
+# HTTP/2 client, orjson-encoded (and, for larger batches, gzipped) bodies, and
+# the service-account token as a bearer header.
+SHEETS_API = "https://sheets.googleapis.com/v4/spreadsheets"
+_RETRY_STATUSES = (429, 500, 502, 503, 504)
+_RETRIES = 5
+_GZIP_MIN_BYTES = 1024  # below this gzip framing outweighs the savings
+_gzip_ok = True  # cleared if Sheets turns out not to accept Content-Encoding: gzip
+_http: Optional[httpx.AsyncClient] = None
+_token_lock = asyncio.Lock()
+
+async def _bearer_token() -> str:
+    """Current OAuth2 access token, refreshed on the threadpool once it expires."""
+    async with _token_lock:
+        if not _creds.valid:
+            from google.auth.transport.requests import Request  # type: ignore
+            await run_in_threadpool(_creds.refresh, Request())
+        return _creds.token
+
+async def _post(url: str, params: Dict[str, str], body: bytes) -> httpx.Response:
+    """POST to the Sheets API, retrying 429/5xx with exponential backoff (honours Retry-After).
+    A gzipped body that comes back 400/415 is resent uncompressed once."""
+    global _gzip_ok
+    raw = body
+    headers = {"Content-Type": "application/json"}
+    gzipped = _gzip_ok and len(body) >= _GZIP_MIN_BYTES
+    if gzipped:
+        # Batched rows compress well; level 1 costs next to nothing next to the WAN round-trip
+        body = gzip.compress(body, compresslevel=1)
+        headers["Content-Encoding"] = "gzip"
+    attempt = rejected = 0
+    while True:
+        token = await _bearer_token()
+        resp = await _http.post(
+            url,
+            params=params,
+            content=body,
+            headers={**headers, "Authorization": f"Bearer {token}"},
+        )
+        if gzipped and resp.status_code in (400, 415):
+            # The compressed body itself may have been refused: resend once as plain JSON
+            rejected, body, gzipped = resp.status_code, raw, False
+            del headers["Content-Encoding"]
+            continue
+        if rejected and resp.status_code < 400:
+            LOG.warning("Sheets rejected a gzipped body (%s); sending uncompressed from now on", rejected)
+            _gzip_ok = False
+            rejected = 0
+        if resp.status_code not in _RETRY_STATUSES or attempt >= _RETRIES:
+            return resp
+        retry_after = resp.headers.get("retry-after", "")
+        await asyncio.sleep(float(retry_after) if retry_after.isdigit() else 1.5 * 2 ** attempt)
+        attempt += 1
+
+# appendCells takes typed values, not USER_ENTERED text, so do the parsing the
+# old values:append path got from Sheets: ISO timestamps become real date-times
+# (serial days since 1899-12-30, shown as UTC) and plain numeric strings numbers.
+_ISO_TS_RE = re.compile(r"\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}(?::\d{2}(?:\.\d+)?)?(?:Z|[+-]\d{2}:\d{2})?")
+_NUMBER_RE = re.compile(r"-?\d+(?:\.\d+)?")
+_SHEETS_EPOCH = dt.datetime(1899, 12, 30)
+_DATETIME_FORMAT = {"numberFormat": {"type": "DATE_TIME", "pattern": "yyyy-mm-dd hh:mm:ss"}}
+
+def _serial_datetime(text: str) -> float:
+    ts = dt.datetime.fromisoformat(text.replace("Z", "+00:00"))
+    if ts.tzinfo is not None:
+        ts = ts.astimezone(dt.timezone.utc).replace(tzinfo=None)
+    return (ts - _SHEETS_EPOCH) / dt.timedelta(days=1)
+
+def _cell(value: Any) -> Dict[str, Any]:
+    """CellData for one row value; "" / None leave the cell empty."""
+    if value is None or value == "":
+        return {}
+    if isinstance(value, bool):
+        return {"userEnteredValue": {"boolValue": value}}
+    if isinstance(value, (int, float)):
+        return {"userEnteredValue": {"numberValue": value}}
+    text = str(value).strip()
+    if _ISO_TS_RE.fullmatch(text):
+        try:
+            return {"userEnteredValue": {"numberValue": _serial_datetime(text)},
+                    "userEnteredFormat": _DATETIME_FORMAT}
+        except ValueError:
+            pass  # not a real date; keep the text
+    if _NUMBER_RE.fullmatch(text):
+        return {"userEnteredValue": {"numberValue": float(text)}}
+    return {"userEnteredValue": {"stringValue": str(value)}}
+
+async def _build_requests(batches: List[Tuple[str, List[Sequence[Any]]]], fresh: Set[str]) -> List[Dict[str, Any]]:
+    """One appendCells request per worksheet, creating missing worksheets (names added to fresh)."""
+    requests = []
+    for worksheet_name, rows in batches:
+        if worksheet_name not in _ws_cache and await run_in_threadpool(_resolve_worksheet, worksheet_name):
+            fresh.add(worksheet_name)
+        if worksheet_name in fresh:
+            # New worksheet; headers go out in the same call as the first batch
+            headers = _headers.get(worksheet_name)
+            if headers:
+                rows = [headers, *rows]
+        requests.append({"appendCells": {
+            "sheetId": _ws_cache[worksheet_name].id,
+            "rows": [{"values": [_cell(v) for v in row]} for row in rows],
+            "fields": "userEnteredValue,userEnteredFormat.numberFormat",
+        }})
+    return requests
+
+async def _append_batches(batches: List[Tuple[str, List[Sequence[Any]]]]) -> bool:
+    """Append every worksheet's rows in a single spreadsheets.batchUpdate call
+    (one appendCells request per worksheet); create worksheets (with headers) if missing.
+    Returns False if the rows were not written."""
+    if _sheet is None:
+        return True  # not configured; nothing to keep
+    names = ", ".join(name for name, _ in batches)
+    total = sum(len(rows) for _, rows in batches)
+    fresh: Set[str] = set()
+    try:
+        for attempt in range(2):
+            requests = await _build_requests(batches, fresh)
+            resp = await _post(f"{SHEETS_API}/{_sheet.id}:batchUpdate", {}, orjson.dumps({"requests": requests}))
+            if resp.status_code not in (400, 404) or attempt:
+                break
+            # A worksheet was deleted or renamed; look them all up again and retry once
+            for worksheet_name, _ in batches:
+                _ws_cache.pop(worksheet_name, None)
+        resp.raise_for_status()
+        LOG.debug("Logged %d row(s) to %s", total, names)
+        return True
+    except Exception as e:
+        LOG.error("Failed to append %d row(s) to %s: %s", total, names, e)
+        return False
+
+async def aclose() -> None:
+    """Close the pooled HTTP client (call on shutdown, after the final flush)."""
+    global _http
+    if _http is not None:
+        await _http.aclose()
+        _http = None
+
+# -----------------------------------------------------------------------------
+# Buffered writes
+# -----------------------------------------------------------------------------
+# Rows are buffered per worksheet and written by a background task, so the
+# /log/* endpoints never wait on a Sheets round-trip.
+FLUSH_INTERVAL = float(os.getenv("GSHEET_FLUSH_INTERVAL", "3"))  # seconds
+FLUSH_MAX_ROWS = int(os.getenv("GSHEET_FLUSH_MAX_ROWS", "50"))  # flush early past this
+MAX_ATTEMPTS = int(os.getenv("GSHEET_MAX_ATTEMPTS", "5"))  # failed flushes before rows are dropped
+_buffers: Dict[str, Deque[Sequence[Any]]] = defaultdict(deque)
+_headers: Dict[str, List[str]] = {}
+_flush_lock = asyncio.Lock()
+_flush_now = asyncio.Event()
+_failures = 0  # consecutive failed flushes
+
+# Sheets quotas are per user, so calls go through one pacer (as gspread_asyncio
+# does) instead of racing Google; 429s are retried in _post.
+API_DELAY = float(os.getenv("GSHEET_API_DELAY", "1.1"))  # min seconds between calls
+_pace_lock = asyncio.Lock()
+_last_call = 0.0
+
+def enqueue_row(worksheet_name: str, row: Sequence[Any], headers: Optional[List[str]] = None) -> None:
+    """Buffer a row for the background flusher and return immediately."""
+    if headers:
+        _headers.setdefault(worksheet_name, headers)
+    buf = _buffers[worksheet_name]
+    buf.append(row)
+    if len(buf) >= FLUSH_MAX_ROWS:
+        _flush_now.set()
+
+async def _paced(fn: Callable[..., Awaitable[Any]], *args: Any) -> Any:
+    """Run a Sheets call started no closer than API_DELAY seconds after the last one."""
+    global _last_call
+    async with _pace_lock:
+        loop = asyncio.get_running_loop()
+        wait = _last_call + API_DELAY - loop.time()
+        if wait > 0:
+            await asyncio.sleep(wait)
+        _last_call = loop.time()
+    return await fn(*args)
+
+async def flush() -> bool:
+    """Write every worksheet buffer in one batchUpdate call, whatever the number of worksheets.
+    Rows stay at the front of their buffers until the append succeeds; after
+    MAX_ATTEMPTS failed flushes in a row they are dropped. Returns False on failure."""
+    global _http, _failures
+    async with _flush_lock:
+        # Only enqueue_row touches the buffers outside this lock, and it appends at the back
+        batches = [(name, list(buf)) for name, buf in list(_buffers.items()) if buf]
+        if not batches:
+            return True
+        if not _READY:
+            await run_in_threadpool(init)  # normally done at startup
+        if _http is None:
+            _http = httpx.AsyncClient(timeout=10.0, http2=True)
+        ok = await _paced(_append_batches, batches)
+        if ok:
+            _failures = 0
+        else:
+            _failures += 1
+            if _failures < MAX_ATTEMPTS:
+                return False
+            LOG.error("Dropping %d row(s) after %d failed flushes", sum(len(rows) for _, rows in batches), _failures)
+            _failures = 0
+        for worksheet_name, rows in batches:
+            buf = _buffers[worksheet_name]
+            for _ in rows:
+                buf.popleft()
+        return ok
+
+async def run_flusher() -> None:
+    """Flush every FLUSH_INTERVAL seconds, or sooner when a buffer fills up;
+    back off (doubling, up to a minute) while Sheets keeps failing."""
+    while True:
+        try:
+            await asyncio.wait_for(_flush_now.wait(), timeout=FLUSH_INTERVAL)
+        except asyncio.TimeoutError:
+            pass
+        _flush_now.clear()
+        if not await flush():
+            await asyncio.sleep(min(FLUSH_INTERVAL * 2 ** _failures, 60.0))
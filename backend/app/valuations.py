@@ -1,12 +1,19 @@
 # backend/app/valuations.py
 from __future__ import annotations
-import os, re, math, logging
+import os, re, csv, logging
+from bisect import bisect_right
+from functools import lru_cache
 from pathlib import Path
-from typing import Optional, List, Tuple
-import pandas as pd
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import TYPE_CHECKING, Optional, List, Tuple, Dict, Mapping, Callable, TypeVar
 
 from .models import ValuationInput, ValuationOutput, ChartBar
 
+if TYPE_CHECKING:
+    import numpy as np
+    from numpy.typing import ArrayLike
+
 # =============================================================================
 # Logging
 # =============================================================================
@@ -18,6 +25,8 @@ if not LOG.handlers:
 DEBUG = str(os.getenv("VAL_DEBUG", "")).lower() in ("1", "true", "yes", "on")
 LOG.setLevel(logging.DEBUG if DEBUG else logging.INFO)
 
+Row = TypeVar("Row")
+
 def _here() -> Path:
     return Path(__file__).resolve().parent
 
@@ -25,24 +34,39 @@ def _here() -> Path:
 # =============================================================================
 # Fallback tables (updated with Q2 2025 GF Data)
 # =============================================================================
-_TEV_FALLBACK = pd.DataFrame([
-    {"TEV": "10-25",   "Multiple": 6.1, "Average": 5.9},
-    {"TEV": "25-50",   "Multiple": 6.8, "Average": 6.7},
-    {"TEV": "50-100",  "Multiple": 7.7, "Average": 7.7},
-    {"TEV": "100-250", "Multiple": 9.0, "Average": 8.6},
-    {"TEV": "250-500", "Multiple": 8.0, "Average": 9.7},
-])
-
-_INDUSTRY_FALLBACK = pd.DataFrame([
-    {"Industry": "Manufacturing", "Multiple": 6.5, "Average": 6.4},
-    {"Industry": "Business Services", "Multiple": 7.5, "Average": 7.0},
-    {"Industry": "Healthcare Services", "Multiple": 8.3, "Average": 7.7},
-    {"Industry": "Distribution", "Multiple": 7.0, "Average": 6.8},
-    {"Industry": "All-Industry", "Multiple": 6.9, "Average": 6.9},
-])
+@dataclass(frozen=True, slots=True)
+class TevRow:
+    band: str  # normalized 'lo-hi' label, $M
+    multiple: float
+    average: float
+
+@dataclass(frozen=True, slots=True)
+class IndustryRow:
+    industry: str
+    multiple: float
+    average: float
+
+_TEV_FALLBACK: Tuple[TevRow, ...] = (
+    TevRow("10-25",   6.1, 5.9),
+    TevRow("25-50",   6.8, 6.7),
+    TevRow("50-100",  7.7, 7.7),
+    TevRow("100-250", 9.0, 8.6),
+    TevRow("250-500", 8.0, 9.7),
+)
+
+_INDUSTRY_FALLBACK: Tuple[IndustryRow, ...] = (
+    IndustryRow("Manufacturing",       6.5, 6.4),
+    IndustryRow("Business Services",   7.5, 7.0),
+    IndustryRow("Healthcare Services", 8.3, 7.7),
+    IndustryRow("Distribution",        7.0, 6.8),
+    IndustryRow("All-Industry",        6.9, 6.9),
+)
 
 PE_STACK_MULTIPLE = 5.92
 
+# ± band around the baseline TEV (deal terms, negotiation, market timing); read once at import
+_TEV_ERROR_MARGIN = float(os.getenv("TEV_ERROR_MARGIN", "0.15"))  # 15%
+
 # Expected Debt/EBITDA by TEV band (from GF Data Chart 22)
 _DEBT_EBITDA_BENCHMARKS = {
     "10-25": 3.9,
@@ -56,59 +80,102 @@ _DEBT_EBITDA_BENCHMARKS = {
 # =============================================================================
 # CSV loading helpers
 # =============================================================================
-def _read_csv(path: Path) -> Optional[pd.DataFrame]:
+def _read_csv(path: Path) -> Optional[List[Dict[str, str]]]:
     try:
-        df = pd.read_csv(path)
-        LOG.debug(f"Loaded CSV {path} shape={df.shape} cols={list(df.columns)}")
-        return df
+        with path.open(newline="", encoding="utf-8-sig") as f:
+            rows = [{(k or "").strip(): (v or "").strip() for k, v in r.items()} for r in csv.DictReader(f)]
+        LOG.debug("Loaded CSV %s rows=%d", path, len(rows))
+        return rows
     except Exception as e:
-        LOG.warning(f"Failed to read CSV {path}: {e}")
+        LOG.warning("Failed to read CSV %s: %s", path, e)
         return None
 
-def _load_csv_or_fallback(filename: str, needed: List[str], fallback: pd.DataFrame) -> pd.DataFrame:
+def _load_csv_or_fallback(filename: str, needed: List[str], make_row: Callable[[Dict[str, str]], Row],
+                          key: Callable[[Row], str], fallback: Tuple[Row, ...]) -> Mapping[str, Row]:
+    """Load a table as {key(row): row}, in file order; first row wins on duplicate keys.
+    The result is cached and shared by every caller, so it is returned read-only."""
+    rows: Tuple[Row, ...] = ()
     for p in (_here() / filename, Path.cwd() / filename):
         if p.exists():
-            df = _read_csv(p)
-            if df is None:
+            raw = _read_csv(p)
+            if raw is None:
                 continue
-            df.columns = [c.strip() for c in df.columns]
-            if set(needed).issubset(df.columns):
-                LOG.info(f"Using CSV '{filename}' at {p}")
-                return df
-            LOG.warning(f"{filename} at {p} missing {set(needed)-set(df.columns)}; using fallback")
+            cols = set(raw[0]) if raw else set()
+            if set(needed).issubset(cols):
+                try:
+                    rows = tuple(make_row(r) for r in raw)
+                    LOG.info("Using CSV '%s' at %s", filename, p)
+                except ValueError as e:
+                    LOG.warning("%s at %s has a non-numeric multiple (%s); using fallback", filename, p, e)
+                break
+            LOG.warning("%s at %s missing %s; using fallback", filename, p, set(needed) - cols)
             break
-    LOG.warning(f"No usable {filename}; using fallback shape={fallback.shape}")
-    return fallback.copy()
+    if not rows:
+        LOG.warning("No usable %s; using fallback rows=%d", filename, len(fallback))
+        rows = fallback
+    table: Dict[str, Row] = {}
+    for row in rows:
+        table.setdefault(key(row), row)
+    return MappingProxyType(table)
 
-def _load_tev_table() -> pd.DataFrame:
-    return _load_csv_or_fallback("multiples_tev.csv", ["TEV","Multiple","Average"], _TEV_FALLBACK)
+def _industry_key(name: str) -> str:
+    return str(name).strip().lower()
 
-def _load_industry_table() -> pd.DataFrame:
-    return _load_csv_or_fallback("multiples_industry.csv", ["Industry","Multiple","Average"], _INDUSTRY_FALLBACK)
+# The CSVs ship with the app and don't change while it runs: parse each once per process
+@lru_cache(maxsize=None)
+def _load_tev_table() -> Mapping[str, TevRow]:
+    return _load_csv_or_fallback(
+        "multiples_tev.csv", ["TEV", "Multiple", "Average"],
+        lambda r: TevRow(_norm_band_label(r["TEV"]), float(r["Multiple"]), float(r["Average"])),
+        lambda row: row.band,
+        _TEV_FALLBACK,
+    )
+
+@lru_cache(maxsize=None)
+def _load_industry_table() -> Mapping[str, IndustryRow]:
+    return _load_csv_or_fallback(
+        "multiples_industry.csv", ["Industry", "Multiple", "Average"],
+        lambda r: IndustryRow(r["Industry"], float(r["Multiple"]), float(r["Average"])),
+        lambda row: _industry_key(row.industry),
+        _INDUSTRY_FALLBACK,
+    )
 
 
 # =============================================================================
 # Helper functions
 # =============================================================================
+_BAND_RE = re.compile(r"(\d+)\s*[-–—]\s*(\d+)")
+
+@lru_cache(maxsize=256)
 def _norm_band_label(s: str) -> str:
     """Normalize a TEV label to 'lo-hi' format"""
     s = str(s)
-    m = re.search(r"(\d+)\s*[-–—]\s*(\d+)", s)
-    return f"{m.group(1)}-{m.group(2)}" if m else s.strip()
+    m = _BAND_RE.search(s)
+    return f"{m[1]}-{m[2]}" if m else s.strip()
 
 def _find_tev_band(tev: float) -> str:
     """Determine which TEV band a value falls into (in millions)"""
-    tev_m = tev / 1_000_000
-    if tev_m < 25:
-        return "10-25"
-    elif tev_m < 50:
-        return "25-50"
-    elif tev_m < 100:
-        return "50-100"
-    elif tev_m < 250:
-        return "100-250"
-    else:
-        return "250-500"
+    # Band edges are whole $M, so flooring to millions keeps the band and gives a small cache key
+    return _find_tev_band_m(int(tev // 1_000_000))
+
+@lru_cache(maxsize=256)
+def _find_tev_band_m(tev_m: int) -> str:
+    edges, labels = _tev_band_edges()
+    return labels[bisect_right(edges, tev_m)]
+
+@lru_cache(maxsize=None)
+def _tev_band_edges() -> Tuple[Tuple[int, ...], Tuple[str, ...]]:
+    """(upper edges of all but the top band in $M, band labels), ascending, from the TEV table.
+    Below the first edge is the lowest band; at or above the last edge, the top band."""
+    bands = sorted(
+        (int(m[1]), int(m[2]), label)
+        for label in _load_tev_table()
+        if (m := _BAND_RE.fullmatch(label))
+    )
+    if not bands:
+        LOG.warning("TEV table has no 'lo-hi' band labels; using fallback bands")
+        bands = sorted((int(m[1]), int(m[2]), row.band) for row in _TEV_FALLBACK if (m := _BAND_RE.fullmatch(row.band)))
+    return tuple(hi for _, hi, _ in bands[:-1]), tuple(label for _, _, label in bands)
 
 
 # =============================================================================
@@ -128,51 +195,68 @@ def compute_valuation(payload: ValuationInput) -> ValuationOutput:
     d = float(payload.debt_pct) if payload.debt_pct is not None else None
     industry = payload.industry
     
-    debt_str = f"{d:.0%}" if d is not None else "N/A"
-    LOG.info(f"Inputs: EBITDA={e:,.0f}, debt%={debt_str}, industry={industry!r}")
+    if LOG.isEnabledFor(logging.DEBUG):
+        debt_str = f"{d:.0%}" if d is not None else "N/A"
+        LOG.debug(f"Inputs: EBITDA={e:,.0f}, debt%={debt_str}, industry={industry!r}")
+
+    # No industry and no debt %: nothing to look up or validate
+    if d is None and not industry:
+        return _compute_default(e)
 
     # 1) Load data
-    tev_df = _load_tev_table()
-    ind_df = _load_industry_table()
+    ind_table = _load_industry_table()
 
     # 2) Get industry multiple (primary method)
     ind_mult_current = ind_mult_avg = None
     
-    if industry and isinstance(ind_df, pd.DataFrame) and len(ind_df):
-        sel = ind_df.loc[ind_df["Industry"].astype(str).str.strip().str.lower()
-                         == industry.strip().lower()]
-        if not sel.empty:
-            ind_mult_current = float(sel.iloc[0]["Multiple"])
-            ind_mult_avg = float(sel.iloc[0]["Average"])
-            LOG.info(f"Industry '{industry}': current={ind_mult_current:.2f}x, avg={ind_mult_avg:.2f}x")
+    if industry and ind_table:
+        hit = ind_table.get(_industry_key(industry))
+        if hit is not None:
+            ind_mult_current, ind_mult_avg = hit.multiple, hit.average
+            LOG.debug("Industry '%s': current=%.2fx, avg=%.2fx", industry, ind_mult_current, ind_mult_avg)
         else:
-            LOG.warning(f"Industry '{industry}' not found; using All-Industry")
+            LOG.warning("Industry '%s' not found; using All-Industry", industry)
     
     # Fallback to All-Industry if no specific industry match
     if ind_mult_current is None:
-        all_ind = ind_df.loc[ind_df["Industry"].astype(str).str.lower() == "all-industry"]
-        if not all_ind.empty:
-            ind_mult_current = float(all_ind.iloc[0]["Multiple"])
-            ind_mult_avg = float(all_ind.iloc[0]["Average"])
-        else:
-            # Ultimate fallback from TEV table
-            ind_mult_current = float(tev_df.iloc[0]["Multiple"])
-            ind_mult_avg = float(tev_df.iloc[0]["Average"])
+        ind_mult_current, ind_mult_avg = _default_multiples()
     
+    return _valuation_from_multiples(e, d, industry, ind_mult_current, ind_mult_avg)
+
+@lru_cache(maxsize=None)
+def _default_multiples() -> Tuple[float, float]:
+    """All-Industry (current, average) multiples, else the first TEV band's."""
+    all_ind = _load_industry_table().get("all-industry")
+    if all_ind is not None:
+        return all_ind.multiple, all_ind.average
+    # Ultimate fallback from TEV table (first band)
+    first = next(iter(_load_tev_table().values()))
+    return first.multiple, first.average
+
+def _compute_default(e: float) -> ValuationOutput:
+    """Valuation with no industry and no debt % (the anonymous preview case)."""
+    ind_mult_current, ind_mult_avg = _default_multiples()
+    return _valuation_from_multiples(e, None, None, ind_mult_current, ind_mult_avg)
+
+def _valuation_from_multiples(e: float, d: Optional[float], industry: Optional[str],
+                              ind_mult_current: float, ind_mult_avg: float) -> ValuationOutput:
+    """Steps 3-9 of compute_valuation, once the industry multiples are known."""
     # 3) Calculate baseline TEV from industry multiple
     tev_current = e * ind_mult_current
     tev_avg = e * ind_mult_avg
     tev_baseline = tev_current  # Use current as baseline
     
-    LOG.info(f"Baseline TEV: current={tev_current:,.0f}, avg={tev_avg:,.0f}")
+    if LOG.isEnabledFor(logging.DEBUG):
+        LOG.debug(f"Baseline TEV: current={tev_current:,.0f}, avg={tev_avg:,.0f}")
     
     # 4) Add error margin to TEV (±15% default, configurable)
     # This accounts for deal-specific factors, negotiation, market timing
-    error_margin = float(os.getenv("TEV_ERROR_MARGIN", "0.15"))  # 15%
+    error_margin = _TEV_ERROR_MARGIN
     tev_low = tev_baseline * (1 - error_margin)
     tev_high = tev_baseline * (1 + error_margin)
     
-    LOG.info(f"TEV range with ±{error_margin:.0%} margin: [{tev_low:,.0f}, {tev_high:,.0f}]")
+    if LOG.isEnabledFor(logging.DEBUG):
+        LOG.debug(f"TEV range with ±{error_margin:.0%} margin: [{tev_low:,.0f}, {tev_high:,.0f}]")
     
     # 5) Determine TEV band and validate debt sustainability
     band_label = _find_tev_band(tev_baseline)
@@ -184,9 +268,8 @@ def compute_valuation(payload: ValuationInput) -> ValuationOutput:
         implied_debt = tev_baseline * d
         implied_debt_ebitda = implied_debt / e
         
-        LOG.info(f"Debt validation: band={band_label}, "
-                f"implied D/EBITDA={implied_debt_ebitda:.2f}x, "
-                f"benchmark={expected_debt_ebitda:.2f}x")
+        LOG.debug("Debt validation: band=%s, implied D/EBITDA=%.2fx, benchmark=%.2fx",
+                  band_label, implied_debt_ebitda, expected_debt_ebitda)
         
         # Flag if over-leveraged (>20% above benchmark)
         if implied_debt_ebitda > expected_debt_ebitda * 1.2:
@@ -197,10 +280,9 @@ def compute_valuation(payload: ValuationInput) -> ValuationOutput:
     
     # 6) Calculate additional valuation tracks for context
     # Get TEV band multiples for comparison
-    tev_band_row = tev_df.loc[tev_df["TEV"].astype(str).map(_norm_band_label) == band_label]
-    if not tev_band_row.empty:
-        tev_mult_current = float(tev_band_row.iloc[0]["Multiple"])
-        tev_mult_avg = float(tev_band_row.iloc[0]["Average"])
+    tev_band_row = _load_tev_table().get(band_label)
+    if tev_band_row is not None:
+        tev_mult_current, tev_mult_avg = tev_band_row.multiple, tev_band_row.average
         EV_TEV_current = e * tev_mult_current
         EV_TEV_avg = e * tev_mult_avg
     else:
@@ -215,15 +297,19 @@ def compute_valuation(payload: ValuationInput) -> ValuationOutput:
     expected_low = tev_low
     expected_high = tev_high
     
-    # 8) Chart bars for visualization
-    bars: List[ChartBar] = []
-    bars.append(ChartBar(name=f"TEV Range Low", value=float(tev_low)))
-    bars.append(ChartBar(name=f"TEV Range High", value=float(tev_high)))
-    bars.append(ChartBar(name=f"Industry Current ({industry or 'All'})", value=float(tev_current)))
-    bars.append(ChartBar(name=f"Industry 5-yr Avg", value=float(tev_avg)))
-    bars.append(ChartBar(name=f"TEV Band Current ({band_label}M)", value=float(EV_TEV_current)))
-    bars.append(ChartBar(name=f"TEV Band 5-yr Avg", value=float(EV_TEV_avg)))
-    bars.append(ChartBar(name="PE Stack", value=float(EV_PE_stack)))
+    # 8) Chart bars for visualization. Every name/value is built here as str/float,
+    # so model_construct skips pydantic validation without risk.
+    bars: List[ChartBar] = [
+        ChartBar.model_construct(name=name, value=float(value)) for name, value in (
+            ("TEV Range Low", tev_low),
+            ("TEV Range High", tev_high),
+            (f"Industry Current ({industry or 'All'})", tev_current),
+            ("Industry 5-yr Avg", tev_avg),
+            (f"TEV Band Current ({band_label}M)", EV_TEV_current),
+            ("TEV Band 5-yr Avg", EV_TEV_avg),
+            ("PE Stack", EV_PE_stack),
+        )
+    ]
     
     # 9) Notes for transparency
     notes = (f"Method: Industry multiple; "
@@ -235,7 +321,7 @@ def compute_valuation(payload: ValuationInput) -> ValuationOutput:
     if debt_warning:
         notes += f"; WARNING: {debt_warning}"
     
-    return ValuationOutput(
+    return ValuationOutput.model_construct(
         enterprise_value=float(tev_baseline),
         expected_valuation=float(expected_valuation),
         expected_low=float(expected_low),
@@ -245,4 +331,71 @@ def compute_valuation(payload: ValuationInput) -> ValuationOutput:
         unlocked=False,
         bars=bars,
         notes=notes,
-    )
\ No newline at end of file
+    )
+
+# =============================================================================
+# Batch entry point
+# =============================================================================
+def compute_valuation_batch(ebitdas: ArrayLike, debt_pcts: ArrayLike,
+                            industries: List[Optional[str]]) -> Dict[str, np.ndarray]:
+    """
+    Vectorized compute_valuation for many inputs at once (e.g. back-testing or
+    bulk re-scoring). Table lookups run once per row; every EV track, the TEV
+    range and the leverage check are single NumPy ops over the whole batch.
+
+    debt_pcts may hold NaN where the debt % is unknown. Returns arrays aligned
+    with the inputs (band_label is an object array of labels).
+    """
+    import numpy as np  # only batch callers pay for the import
+
+    e = np.asarray(ebitdas, dtype=np.float64)
+    d = np.asarray(debt_pcts, dtype=np.float64)
+    n = e.shape[0]
+    if d.shape[0] != n or len(industries) != n:
+        raise ValueError("ebitdas, debt_pcts and industries must be the same length")
+
+    tev_table = _load_tev_table()
+    ind_table = _load_industry_table()
+
+    # Industry multiples, with the same fallbacks as compute_valuation
+    default = _default_multiples()
+    mult_curr = np.empty(n)
+    mult_avg = np.empty(n)
+    for i, industry in enumerate(industries):
+        row = ind_table.get(_industry_key(industry)) if industry else None
+        mult_curr[i], mult_avg[i] = (row.multiple, row.average) if row else default
+
+    tev_current = e * mult_curr
+    tev_avg = e * mult_avg
+    tev_low = tev_current * (1 - _TEV_ERROR_MARGIN)
+    tev_high = tev_current * (1 + _TEV_ERROR_MARGIN)
+
+    # TEV band per row, then that band's multiples / leverage benchmark
+    # (searchsorted side="right" is the vector form of _find_tev_band's bisect_right)
+    edges, labels = _tev_band_edges()
+    band_idx = np.searchsorted(np.asarray(edges, dtype=np.float64), tev_current / 1_000_000, side="right")
+    band_rows = [tev_table.get(label) for label in labels]
+    band_mult_curr = np.array([r.multiple if r else np.nan for r in band_rows])[band_idx]
+    band_mult_avg = np.array([r.average if r else np.nan for r in band_rows])[band_idx]
+    benchmark = np.array([_DEBT_EBITDA_BENCHMARKS.get(label, 4.0) for label in labels])[band_idx]
+
+    # Bands missing from the table fall back to the industry track, as in compute_valuation
+    ev_tev_current = np.where(np.isnan(band_mult_curr), tev_current, e * band_mult_curr)
+    ev_tev_avg = np.where(np.isnan(band_mult_avg), tev_avg, e * band_mult_avg)
+
+    # implied debt / EBITDA = (TEV * d) / e = industry multiple * d; NaN where d is unknown
+    implied_debt_ebitda = mult_curr * d
+
+    return {
+        "enterprise_value": tev_current,
+        "expected_low": tev_low,
+        "expected_high": tev_high,
+        "ev_ind_current": tev_current,
+        "ev_ind_avg": tev_avg,
+        "ev_tev_current": ev_tev_current,
+        "ev_tev_avg": ev_tev_avg,
+        "ev_pe_stack": e * PE_STACK_MULTIPLE,
+        "implied_debt_ebitda": implied_debt_ebitda,
+        "over_leveraged": implied_debt_ebitda > benchmark * 1.2,
+        "band_label": np.array(labels, dtype=object)[band_idx],
+    }